@@ -0,0 +1,794 @@
+#!/usr/bin/env python3
+"""
+Core file operations for Gemini Engineer.
+
+This module deliberately imports only the standard library so that tooling
+(like demo.py) can use the file operations without paying the startup cost of
+the Gemini SDK, rich, prompt_toolkit and friends pulled in by main.py.
+"""
+
+import io
+import os
+import mmap
+import fnmatch
+import stat
+import time
+import asyncio
+import functools
+import mimetypes
+from pathlib import Path
+from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+
+# File size limit (1MB)
+MAX_FILE_SIZE = 1024 * 1024
+
+# Buffer size for edit_file's read-modify-write path (default 8 KiB buffers
+# cost noticeably more syscalls on medium/large files)
+_EDIT_BUFFER_SIZE = 131072
+
+# Comprehensive exclusion lists for file operations
+EXCLUDED_FILES = {
+    # Python specific
+    ".DS_Store", "Thumbs.db", ".gitignore", ".python-version",
+    "uv.lock", ".uv", "uvenv", ".uvenv", ".venv", "venv",
+    "__pycache__", ".pytest_cache", ".coverage", ".mypy_cache",
+    # Node.js / Web specific
+    "node_modules", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
+    ".next", ".nuxt", "dist", "build", ".cache", ".parcel-cache",
+    ".turbo", ".vercel", ".output", ".contentlayer",
+    # Build outputs
+    "out", "coverage", ".nyc_output", "storybook-static",
+    # Environment and config
+    ".env", ".env.local", ".env.development", ".env.production",
+    # Misc
+    ".git", ".svn", ".hg", "CVS"
+}
+
+EXCLUDED_EXTENSIONS = {
+    # Binary and media files
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp", ".avif",
+    ".mp4", ".webm", ".mov", ".mp3", ".wav", ".ogg",
+    ".zip", ".tar", ".gz", ".7z", ".rar",
+    ".exe", ".dll", ".so", ".dylib", ".bin",
+    # Documents
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    # Python specific
+    ".pyc", ".pyo", ".pyd", ".egg", ".whl",
+    # UV specific
+    ".uv", ".uvenv",
+    # Database and logs
+    ".db", ".sqlite", ".sqlite3", ".log",
+    # IDE specific
+    ".idea", ".vscode",
+    # Web specific
+    ".map", ".chunk.js", ".chunk.css",
+    ".min.js", ".min.css", ".bundle.js", ".bundle.css",
+    # Cache and temp files
+    ".cache", ".tmp", ".temp",
+    # Font files
+    ".ttf", ".otf", ".woff", ".woff2", ".eot"
+}
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_path_cached(cwd: str, file_path: str) -> Path:
+    """Resolve and validate a path for a given working directory (memoized)."""
+    resolved = os.path.realpath(file_path)
+
+    # Ensure the path is within the current working directory. A single
+    # C-level commonpath comparison is both faster and stricter than a
+    # string prefix check (which would accept sibling dirs like cwd + "-x").
+    try:
+        if os.path.commonpath([resolved, cwd]) != cwd:
+            raise ValueError(f"Path {file_path} is outside the current directory")
+    except ValueError: # Also raised by commonpath for different drives on Windows
+        raise ValueError(f"Path {file_path} is outside the current directory")
+
+    return Path(resolved)
+
+def normalize_path(file_path: str) -> Path:
+    """Normalize and validate file path to prevent directory traversal."""
+    # Keying the cache on the current working directory keeps the security
+    # check correct across chdir while repeated lookups of the same path
+    # skip the resolve() syscall chain entirely.
+    return _normalize_path_cached(os.getcwd(), file_path)
+
+def should_exclude_file(file_path: Path) -> bool:
+    """Check if a file should be excluded from processing."""
+    # Check if file name is in excluded files
+    if file_path.name in EXCLUDED_FILES:
+        return True
+
+    # Check if file extension is in excluded extensions
+    if file_path.suffix.lower() in EXCLUDED_EXTENSIONS:
+        return True
+
+    # Check for compound extensions like .min.js, .chunk.css, etc.
+    filename_lower = file_path.name.lower()
+    for ext in EXCLUDED_EXTENSIONS:
+        if filename_lower.endswith(ext):
+            return True
+
+    # Check if it's a hidden file (starts with .)
+    if file_path.name.startswith('.'):
+        return True
+
+    # Check if any parent directory is in excluded files
+    for parent in file_path.parents:
+        if parent.name in EXCLUDED_FILES:
+            return True
+
+    return False
+
+# Cap on characters returned per file; anything past this would only bloat
+# the LLM context, so the tail is dropped and the result flagged truncated
+_MAX_CONTENT_CHARS = 200_000
+
+# Files below this size are fetched with a single over-sized read whose
+# short result doubles as the EOF check (most config/source files fit)
+_SMALL_READ_SIZE = 4096
+
+# Reads at or above this size get kernel readahead hints (posix_fadvise).
+# Kept well under MAX_FILE_SIZE so the hint actually fires for allowed files.
+_FADVISE_THRESHOLD = 128 * 1024
+
+# Number of leading bytes sniffed to classify a file as text or binary
+_SNIFF_PREFIX_SIZE = 512
+
+# Common text file extensions (frozenset so membership is one hash lookup,
+# with no per-call list construction)
+_TEXT_EXTENSIONS = frozenset({
+    '.txt', '.py', '.js', '.ts', '.html', '.css', '.json', '.xml',
+    '.yaml', '.yml', '.md', '.rst', '.sh', '.bat', '.gitignore', '.env', '.toml'
+})
+
+@functools.lru_cache(maxsize=2048)
+def _guess_mime_type(suffix: str):
+    """Cached mimetypes lookup; mimetypes is suffix-driven anyway."""
+    mime_type, _ = mimetypes.guess_type('f' + suffix)
+    return mime_type
+
+# Instant verdicts from the sniffed prefix: a Unicode BOM means text, a known
+# magic number means binary — either way the byte scan is skipped entirely.
+# UTF-32 variants come first so their NUL-bearing BOMs aren't misread as UTF-16.
+_BOM_PREFIXES = (
+    b'\xef\xbb\xbf',        # UTF-8
+    b'\xff\xfe\x00\x00',    # UTF-32 LE
+    b'\x00\x00\xfe\xff',    # UTF-32 BE
+    b'\xff\xfe',            # UTF-16 LE
+    b'\xfe\xff',            # UTF-16 BE
+)
+_BINARY_MAGICS = (
+    b'\x7fELF',             # ELF
+    b'MZ',                  # Windows PE
+    b'\x89PNG\r\n\x1a\n',   # PNG
+    b'\xff\xd8\xff',        # JPEG
+    b'GIF8',                # GIF
+    b'PK\x03\x04',          # ZIP (also jar/whl/docx)
+    b'\x1f\x8b',            # gzip
+    b'%PDF-',               # PDF
+    b'SQLite format 3\x00', # SQLite
+)
+
+# Byte values that can plausibly appear in text: common control characters
+# plus everything printable/high-bit (UTF-8 continuation bytes included).
+# Precomputed once so classification is a single C-level bytes.translate.
+_TEXTCHARS = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+# Cached content sniffs: abs path -> (mtime_ns, is_text). Re-validated via a
+# cheap stat so an edited file is re-sniffed while repeated scans of an
+# unchanged tree skip the open/read entirely.
+_TEXT_SNIFF_CACHE: Dict[str, tuple] = {}
+
+def _read_sniff_prefix(file_path: Path) -> bytes:
+    """Read the leading bytes of a file with a single raw open/read."""
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+    try:
+        return os.read(fd, _SNIFF_PREFIX_SIZE)
+    finally:
+        os.close(fd)
+
+def is_binary_file(file_path: Path) -> bool:
+    """Check if a file is binary."""
+    try:
+        head = _read_sniff_prefix(file_path)
+    except FileNotFoundError:
+        raise
+    except Exception:
+        # If we can't read it, assume it's binary or inaccessible for safety
+        return True
+    if not head:
+        return False
+    # BOM => text even though UTF-16/32 payloads are full of NUL bytes;
+    # a recognized magic number => binary with no scan at all
+    if head.startswith(_BOM_PREFIXES):
+        return False
+    if head.startswith(_BINARY_MAGICS):
+        return True
+    if b'\0' in head:
+        return True
+    # Strict UTF-8 validation runs entirely in C and catches invalid byte
+    # sequences the density heuristic can miss; everything downstream decodes
+    # UTF-8 anyway, so non-UTF-8 data is unusable as text here regardless.
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Tolerate errors in the last 3 bytes: the sniff window may have
+        # split a multibyte character at the boundary.
+        if e.start < len(head) - 3:
+            return True
+    # translate() deletes the text bytes in C, leaving only suspicious ones;
+    # a high density of those means binary without any Python-level byte loop.
+    return len(head.translate(None, _TEXTCHARS)) / len(head) >= 0.30
+
+def is_text_file(file_path: Path, stat_result: os.stat_result = None) -> bool:
+    """Check if a file is a text file based on extension and content.
+
+    Callers that already hold a stat result for the file (e.g. from an
+    fstat on an open fd) can pass it via ``stat_result`` so the sniff-cache
+    check doesn't issue a second metadata syscall.
+    """
+    # First check if it's in excluded extensions (early return for performance)
+    suffix = file_path.suffix.lower()
+    if suffix in EXCLUDED_EXTENSIONS:
+        return False
+
+    # Common text file extensions
+    if suffix in _TEXT_EXTENSIONS:
+        return True
+
+    # Guess mimetype, if it's text, it's likely text
+    mime_type = _guess_mime_type(suffix)
+    if mime_type and mime_type.startswith('text/'):
+        return True
+
+    # Fallback to content sniff, cached per (path, mtime). A file that
+    # vanished or can't be read between the walk and the sniff is treated
+    # as non-text rather than aborting the caller's whole batch.
+    cache_key = str(file_path)
+    try:
+        if stat_result is None:
+            stat_result = os.stat(file_path)
+        mtime_ns = stat_result.st_mtime_ns
+        cached = _TEXT_SNIFF_CACHE.get(cache_key)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        result = not is_binary_file(file_path)
+    except OSError:
+        return False
+    _TEXT_SNIFF_CACHE[cache_key] = (mtime_ns, result)
+    return result
+
+def read_local_file(file_path: str) -> Dict[str, Any]:
+    """Read content of a single file."""
+    try:
+        path = normalize_path(file_path)
+
+        # Open with raw os calls: a single open/fstat/read/close sequence avoids
+        # the extra fstat/lseek/isatty syscalls a BufferedReader would issue.
+        # O_NONBLOCK is a no-op for regular files but keeps an open on a FIFO
+        # from blocking until a writer appears; the S_ISREG check below then
+        # rejects it like any other non-regular file.
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+        except FileNotFoundError:
+            return {"error": f"File '{file_path}' does not exist"}
+        except IsADirectoryError:
+            return {"error": f"'{file_path}' is not a file"}
+
+        try:
+            st = os.fstat(fd)
+
+            if not stat.S_ISREG(st.st_mode):
+                return {"error": f"'{file_path}' is not a file"}
+
+            if st.st_size > MAX_FILE_SIZE:
+                return {"error": f"File '{file_path}' is too large (max {MAX_FILE_SIZE} bytes)"}
+
+            # Reuse the fstat result so the sniff path doesn't stat again
+            if not is_text_file(path, st):
+                return {"error": f"File '{file_path}' appears to be binary or non-textual"}
+
+            if st.st_size >= _FADVISE_THRESHOLD and hasattr(os, 'posix_fadvise'):
+                # Tell the kernel we'll consume the whole file front to back
+                # so it prefetches past the default readahead window.
+                os.posix_fadvise(fd, 0, st.st_size, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, st.st_size, os.POSIX_FADV_WILLNEED)
+
+            if st.st_size < _SMALL_READ_SIZE:
+                # Small-file fast path: one read larger than the file both
+                # fetches the content and proves EOF via the short read, so
+                # no follow-up probe is needed.
+                data = os.read(fd, _SMALL_READ_SIZE)
+                grew = len(data) == _SMALL_READ_SIZE
+            else:
+                # One read sized by fstat covers the whole file; top up only
+                # if the file grew between the fstat and the read.
+                data = os.read(fd, st.st_size)
+                grew = len(data) == st.st_size
+            if grew:
+                tail = os.read(fd, io.DEFAULT_BUFFER_SIZE)
+                while tail:
+                    data += tail
+                    tail = os.read(fd, io.DEFAULT_BUFFER_SIZE)
+        finally:
+            os.close(fd)
+
+        content = data.decode('utf-8')
+
+        result = {
+            "success": True,
+            "file_path": str(path),
+            "content": content,
+            "size": len(data),       # bytes on disk
+            "length": len(content)   # decoded characters
+        }
+        if len(content) > _MAX_CONTENT_CHARS:
+            result["content"] = content[:_MAX_CONTENT_CHARS]
+            result["truncated"] = True
+        return result
+    except Exception as e:
+        return {"error": f"Failed to read '{file_path}': {str(e)}"}
+
+# Upper bound on in-flight concurrent reads (avoids FD exhaustion on huge batches)
+#
+# NOTE: batched io_uring submission (python-liburing) was evaluated for the
+# multi-file read path; it would amortize the per-file syscall cost further on
+# Linux but drags in a native extension for a workload that is already
+# latency-overlapped by the thread offload below. Revisit if profiling ever
+# shows submission overhead (not device latency) dominating large /add scans.
+_MAX_CONCURRENT_READS = 32
+
+async def _read_multiple_files_async(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """Schedule all reads at once so per-file disk latency overlaps."""
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_READS)
+
+    async def read_one(file_path: str) -> Dict[str, Any]:
+        async with semaphore:
+            # read_local_file blocks in read(2), which releases the GIL,
+            # so worker threads genuinely run the I/O in parallel
+            return await asyncio.to_thread(read_local_file, file_path)
+
+    return await asyncio.gather(*(read_one(p) for p in file_paths))
+
+def read_multiple_files(file_paths: List[str]) -> Dict[str, Any]:
+    """Read contents of multiple files concurrently."""
+    results = {}
+    errors = []
+
+    file_results = asyncio.run(_read_multiple_files_async(file_paths)) if file_paths else []
+
+    for file_path, result in zip(file_paths, file_results):
+        if "error" in result:
+            errors.append(f"'{file_path}': {result['error']}")
+        else:
+            results[file_path] = result
+
+    return {
+        "success": len(errors) == 0,
+        "files": results,
+        "errors": errors
+    }
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write data to path, assuming the parent directory already exists."""
+    if len(data) <= 1 << 16:
+        # Small payloads (the common LLM tool-use case) go out in a single
+        # os.write, skipping TextIOWrapper/BufferedWriter construction.
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_CLOEXEC', 0), 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    else:
+        with open(path, 'wb', buffering=max(io.DEFAULT_BUFFER_SIZE, 131072)) as f:
+            f.write(data)
+
+def _try_write(path: Path, data: bytes):
+    """Run _write_file, returning the exception instead of raising."""
+    try:
+        _write_file(path, data)
+    except Exception as e:
+        return e
+    return None
+
+def create_file(file_path: str, content: str) -> Dict[str, Any]:
+    """Create a new file or overwrite an existing one."""
+    try:
+        path = normalize_path(file_path)
+
+        # Create parent directories if they don't exist
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        _write_file(path, content.encode('utf-8'))
+
+        return {
+            "success": True,
+            "file_path": str(path),
+            "size": len(content),
+            "message": f"File '{file_path}' created successfully"
+        }
+    except Exception as e:
+        return {"error": f"Failed to create '{file_path}': {str(e)}"}
+
+async def _write_files_async(jobs: List[tuple]) -> List[Any]:
+    """Schedule all writes at once so per-file disk latency overlaps.
+
+    Each job is a (path, data) pair; the result list holds None for a
+    successful write or the exception raised for that file.
+    """
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_READS)
+
+    async def write_one(path: Path, data: bytes):
+        async with semaphore:
+            return await asyncio.to_thread(_write_file, path, data)
+
+    return await asyncio.gather(
+        *(write_one(path, data) for path, data in jobs),
+        return_exceptions=True
+    )
+
+def create_file_many(pairs: List[tuple], durable: bool = False) -> List[Dict[str, Any]]:
+    """Create many files in one pass from (path, content) pairs.
+
+    Parent directories are deduplicated and created once up front (a batch
+    scaffolding ten files into the same package pays one mkdir, not ten),
+    then each file goes through the same raw-write fast path as create_file.
+    When ``durable`` is True, every affected parent directory is fsynced once
+    at the end — one directory sync per parent instead of one per file.
+    """
+    results = []
+    normalized = []
+    parents = set()
+
+    for file_path, content in pairs:
+        try:
+            path = normalize_path(file_path)
+        except Exception as e:
+            normalized.append((file_path, None, content, e))
+            continue
+        normalized.append((file_path, path, content, None))
+        parents.add(path.parent)
+
+    for parent in parents:
+        try:
+            parent.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass  # the write against this parent reports the real error
+
+    # Issue the writes concurrently (write(2) releases the GIL, like the
+    # read path) and keep result assembly in the original order.
+    jobs = [(path, content.encode('utf-8'))
+            for _, path, content, err in normalized if err is None]
+    if len(jobs) > 1:
+        outcomes = iter(asyncio.run(_write_files_async(jobs)))
+    else:
+        outcomes = iter([_try_write(path, data) for path, data in jobs])
+
+    parents = set()
+    for file_path, path, content, err in normalized:
+        if err is None:
+            outcome = next(outcomes)
+            if isinstance(outcome, BaseException):
+                err = outcome
+        if err is not None:
+            results.append({"error": f"Failed to create '{file_path}': {str(err)}"})
+            continue
+        parents.add(str(path.parent))
+        results.append({
+            "success": True,
+            "file_path": str(path),
+            "size": len(content),
+            "message": f"File '{file_path}' created successfully"
+        })
+
+    if durable:
+        for parent in parents:
+            try:
+                dir_fd = os.open(parent, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            except OSError:
+                continue
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    return results
+
+def create_multiple_files(files: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Create multiple files."""
+    results = {}
+    errors = []
+
+    pairs = []
+    for file_info in files:
+        if "path" not in file_info or "content" not in file_info:
+            errors.append("File info must contain 'path' and 'content' keys")
+            continue
+        pairs.append((file_info["path"], file_info["content"]))
+
+    for (file_path, _), result in zip(pairs, create_file_many(pairs)):
+        if "error" in result:
+            errors.append(f"'{file_path}': {result['error']}")
+        else:
+            results[file_path] = result
+
+    return {
+        "success": len(errors) == 0,
+        "files": results,
+        "errors": errors
+    }
+
+def _edit_file_mmap(path: Path, original_b: bytes, new_b: bytes):
+    """Splice a snippet into a large file through mmap.
+
+    Same-length replacements are overwritten in place with zero copying of
+    the rest of the file; otherwise only the bytes after the edit point are
+    rewritten. Returns (old_size, new_size), or None if the snippet is absent.
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        with mmap.mmap(fd, 0) as mm:
+            pos = mm.find(original_b)
+            if pos < 0:
+                return None
+            old_size = mm.size()
+            if len(new_b) == len(original_b):
+                mm[pos:pos + len(new_b)] = new_b
+                mm.flush()
+                return old_size, old_size
+            tail = bytes(mm[pos + len(original_b):])
+        new_size = old_size - len(original_b) + len(new_b)
+        os.pwrite(fd, new_b + tail, pos)
+        os.ftruncate(fd, new_size)
+        return old_size, new_size
+    finally:
+        os.close(fd)
+
+def edit_file(file_path: str, original_snippet: str, new_snippet: str) -> Dict[str, Any]:
+    """Replace a specific original_snippet with new_snippet in a file."""
+    try:
+        path = normalize_path(file_path)
+
+        try:
+            file_size = os.stat(path).st_size
+        except FileNotFoundError:
+            return {"error": f"File '{file_path}' does not exist"}
+
+        # The whole edit runs on raw bytes: encoding the snippets once is
+        # all that's needed, since UTF-8 is self-synchronizing — an encoded
+        # snippet can only match at a character boundary — so the file is
+        # never decoded or re-encoded.
+        original_b = original_snippet.encode('utf-8')
+        new_b = new_snippet.encode('utf-8')
+
+        if file_size >= _EDIT_BUFFER_SIZE:
+            # Large files are spliced through mmap: a same-length edit turns
+            # into an in-place overwrite, anything else rewrites only from
+            # the edit point on — never the whole file.
+            edited = _edit_file_mmap(path, original_b, new_b)
+            if edited is None:
+                return {"error": f"Original snippet not found in '{file_path}'"}
+            old_size, new_size = edited
+            return {
+                "success": True,
+                "file_path": str(path),
+                "message": f"File '{file_path}' edited successfully",
+                "changes": {
+                    "original_length": old_size,
+                    "new_length": new_size,
+                    "diff": new_size - old_size
+                }
+            }
+
+        # Read current content; a 128 KiB buffer keeps medium/large source
+        # files to a handful of read/write syscalls instead of 8 KiB chunks.
+        with open(path, 'rb', buffering=_EDIT_BUFFER_SIZE) as f:
+            data = f.read()
+
+        # A single find locates the first occurrence (same safety as
+        # replace(..., 1)) and the splice reuses both halves untouched —
+        # one scan over the file instead of the membership-test-plus-replace
+        # double pass.
+        pos = data.find(original_b)
+        if pos < 0:
+            return {"error": f"Original snippet not found in '{file_path}'"}
+        new_data = data[:pos] + new_b + data[pos + len(original_b):]
+
+        # Write back through the shared raw-write helper (single os.write
+        # for small files, large-buffer stream for the rest)
+        _write_file(path, new_data)
+
+        return {
+            "success": True,
+            "file_path": str(path),
+            "message": f"File '{file_path}' edited successfully",
+            "changes": {
+                "original_length": len(data),
+                "new_length": len(new_data),
+                "diff": len(new_data) - len(data)
+            }
+        }
+    except Exception as e:
+        return {"error": f"Failed to edit '{file_path}': {str(e)}"}
+
+# Directory listing cache: abs path -> (dir mtime_ns, cached_at, items).
+# Keyed on the directory's mtime so any create/delete inside it invalidates
+# the entry; the short TTL bounds staleness from same-second modifications.
+_LISTDIR_CACHE: Dict[str, tuple] = {}
+_LISTDIR_CACHE_TTL = 2.0
+
+# Entry count above which per-entry stats are fanned out to worker threads
+_PARALLEL_STAT_THRESHOLD = 256
+
+def _listdir_item(entry: os.DirEntry) -> Dict[str, Any]:
+    """Build one listing item from a scandir entry."""
+    is_file = entry.is_file(follow_symlinks=False)
+    return {
+        "name": entry.name,
+        "type": "directory" if entry.is_dir(follow_symlinks=False) else "file",
+        "size": entry.stat().st_size if is_file else None
+    }
+
+def list_directory(dir_path: str = ".", limit: int = None) -> Dict[str, Any]:
+    """List contents of a directory.
+
+    When ``limit`` is given, only that many items are materialized (the
+    returned ``count`` still reflects the whole directory), so callers that
+    render a preview don't pay for stats on entries they never show.
+    """
+    try:
+        path = normalize_path(dir_path)
+
+        # Tool-call arguments arrive through protobuf Struct, whose numbers
+        # decode as floats (or strings via the fallback extractor); coerce
+        # before anything slices with it.
+        if limit is not None:
+            limit = int(float(limit))
+
+        try:
+            dir_stat = os.stat(path)
+        except FileNotFoundError:
+            return {"error": f"Directory '{dir_path}' does not exist"}
+
+        if not stat.S_ISDIR(dir_stat.st_mode):
+            return {"error": f"'{dir_path}' is not a directory"}
+
+        cache_key = str(path)
+        now = time.monotonic()
+        cached = _LISTDIR_CACHE.get(cache_key)
+        if cached and cached[0] == dir_stat.st_mtime_ns and now - cached[1] < _LISTDIR_CACHE_TTL:
+            items = cached[2]
+            count = len(items)
+            if limit is not None:
+                items = items[:limit]
+        else:
+            # os.scandir carries the entry type straight from the dirent, so
+            # is_dir/is_file answer without a stat syscall on most filesystems;
+            # only files pay a stat, and just for the size field.
+            with os.scandir(path) as entries:
+                # Use comprehensive exclusion logic
+                kept = [e for e in entries if not should_exclude_file(Path(e.path))]
+
+            count = len(kept)
+            if limit is not None:
+                kept = kept[:limit]
+
+            if len(kept) > _PARALLEL_STAT_THRESHOLD:
+                # stat releases the GIL, so on large cold-cache directories
+                # worker threads overlap the per-entry syscall latency.
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    items = list(pool.map(_listdir_item, kept))
+            else:
+                items = [_listdir_item(e) for e in kept]
+            # Only full listings are cached; a limited build is partial
+            if limit is None:
+                _LISTDIR_CACHE[cache_key] = (dir_stat.st_mtime_ns, now, items)
+
+        return {
+            "success": True,
+            "directory": str(path),
+            "items": items,
+            "count": count
+        }
+    except Exception as e:
+        return {"error": f"Failed to list directory '{dir_path}': {str(e)}"}
+
+def _load_gitignore_patterns(root: str) -> List[str]:
+    """Return the simple (name-level) ignore patterns from root/.gitignore.
+
+    Only the common cases are handled — comments, blank lines, negations and
+    anchored (slash-containing) patterns are skipped — since this is a
+    prefilter on top of the hardcoded exclusion lists, not a full gitignore
+    implementation. A trailing slash (directory-only marker) is stripped
+    because the walk applies the patterns to both files and directories.
+    """
+    patterns = []
+    try:
+        with open(os.path.join(root, ".gitignore"), encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or line.startswith('!'):
+                    continue
+                if '/' in line.rstrip('/'):
+                    continue
+                patterns.append(line.rstrip('/'))
+    except OSError:
+        pass
+    return patterns
+
+def walk_text_candidates(root: Path):
+    """Yield files under root worth considering for context ingestion.
+
+    Unlike Path.rglob("*"), excluded and hidden directories are pruned
+    before descent, so a node_modules or .git subtree costs one name check
+    instead of a full enumeration; entry types come from the dirent, so the
+    walk itself issues no per-entry stat calls. Patterns from the root's
+    .gitignore (if any) prune additional entries before they are sniffed.
+    """
+    root = str(root)
+    ignore_patterns = _load_gitignore_patterns(root)
+
+    def ignored(name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pat) for pat in ignore_patterns)
+
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in EXCLUDED_FILES or entry.name.startswith('.'):
+                        continue
+                    if ignore_patterns and ignored(entry.name):
+                        continue
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    entry_path = Path(entry.path)
+                    if should_exclude_file(entry_path):
+                        continue
+                    if ignore_patterns and ignored(entry.name):
+                        continue
+                    yield entry_path
+
+def batch_operations(operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Execute a batch of file operations in a single call.
+
+    Each operation is a dict with an "op" key ("create", "read", "edit" or
+    "list") plus the keyword arguments of the corresponding function. Running
+    the whole batch inside one call amortizes per-call overhead and lets
+    consecutive operations on the same paths hit the normalize_path cache.
+    """
+    dispatch = {
+        "create": create_file,
+        "read": read_local_file,
+        "edit": edit_file,
+        "list": list_directory,
+    }
+
+    results = []
+    errors = []
+
+    for op_info in operations:
+        op = op_info.get("op")
+        func = dispatch.get(op)
+        if func is None:
+            result = {"error": f"Unknown operation: {op}"}
+        else:
+            try:
+                result = func(**{k: v for k, v in op_info.items() if k != "op"})
+            except Exception as e:
+                result = {"error": f"Operation '{op}' failed: {str(e)}"}
+        if "error" in result:
+            errors.append(result["error"])
+        results.append(result)
+
+    return {
+        "success": len(errors) == 0,
+        "results": results,
+        "errors": errors
+    }
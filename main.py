@@ -7,30 +7,51 @@ operations and provide intelligent coding assistance through an interactive term
 """
 
 import os
+import re
 import sys
 import json
+import time
 import asyncio
+import hashlib
+import datetime
 import warnings
-import mimetypes
+from collections import OrderedDict, deque
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+# Core file operations (stdlib-only, importable without the heavy deps below)
+from core import (
+    MAX_FILE_SIZE,
+    EXCLUDED_FILES,
+    EXCLUDED_EXTENSIONS,
+    normalize_path,
+    should_exclude_file,
+    is_binary_file,
+    is_text_file,
+    read_local_file,
+    read_multiple_files,
+    create_file,
+    create_multiple_files,
+    edit_file,
+    list_directory,
+    batch_operations,
+    walk_text_candidates,
+)
 
 # Third-party imports
-import google.generativeai as genai
+# (google.generativeai is imported lazily in setup_gemini_client — it drags
+# in protobuf/grpc and costs hundreds of ms that shouldn't precede the banner)
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from rich.text import Text
-from rich.syntax import Syntax
-from rich.markdown import Markdown
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from prompt_toolkit import prompt
+from prompt_toolkit import PromptSession
 from prompt_toolkit.history import InMemoryHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.completion import WordCompleter
+from prompt_toolkit.completion import ThreadedCompleter, WordCompleter
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field # Although Pydantic is imported, it's not strictly used for tool definitions here, but good for future expansion.
 
 
 # Suppress urllib3 SSL warnings that can interfere with MCP protocol
@@ -42,52 +63,6 @@ load_dotenv()
 # Initialize Rich console
 console = Console()
 
-# File size limit (1MB)
-MAX_FILE_SIZE = 1024 * 1024
-
-# Comprehensive exclusion lists for file operations
-EXCLUDED_FILES = {
-    # Python specific
-    ".DS_Store", "Thumbs.db", ".gitignore", ".python-version",
-    "uv.lock", ".uv", "uvenv", ".uvenv", ".venv", "venv",
-    "__pycache__", ".pytest_cache", ".coverage", ".mypy_cache",
-    # Node.js / Web specific
-    "node_modules", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
-    ".next", ".nuxt", "dist", "build", ".cache", ".parcel-cache",
-    ".turbo", ".vercel", ".output", ".contentlayer",
-    # Build outputs
-    "out", "coverage", ".nyc_output", "storybook-static",
-    # Environment and config
-    ".env", ".env.local", ".env.development", ".env.production",
-    # Misc
-    ".git", ".svn", ".hg", "CVS"
-}
-
-EXCLUDED_EXTENSIONS = {
-    # Binary and media files
-    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp", ".avif",
-    ".mp4", ".webm", ".mov", ".mp3", ".wav", ".ogg",
-    ".zip", ".tar", ".gz", ".7z", ".rar",
-    ".exe", ".dll", ".so", ".dylib", ".bin",
-    # Documents
-    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
-    # Python specific
-    ".pyc", ".pyo", ".pyd", ".egg", ".whl",
-    # UV specific
-    ".uv", ".uvenv",
-    # Database and logs
-    ".db", ".sqlite", ".sqlite3", ".log",
-    # IDE specific
-    ".idea", ".vscode",
-    # Web specific
-    ".map", ".chunk.js", ".chunk.css",
-    ".min.js", ".min.css", ".bundle.js", ".bundle.css",
-    # Cache and temp files
-    ".cache", ".tmp", ".temp",
-    # Font files
-    ".ttf", ".otf", ".woff", ".woff2", ".eot"
-}
-
 # System prompt for Gemini Engineer - defines AI's role and capabilities
 SYSTEM_PROMPT = """You are Gemini Engineer, an AI assistant with access to powerful file operation tools.
 
@@ -113,240 +88,12 @@ EXAMPLES OF WHEN TO USE TOOLS:
 
 You MUST use tools for any file operations. Do not just describe what you would do - DO IT by calling the appropriate function!"""
 
-@dataclass
+@dataclass(slots=True)
 class ConversationMessage:
     """Represents a message in the conversation history."""
     role: str  # Can be 'user', 'assistant', 'system'
     content: str  # Always a string for simplicity
 
-def normalize_path(file_path: str) -> Path:
-    """Normalize and validate file path to prevent directory traversal."""
-    path = Path(file_path).resolve()
-    cwd = Path.cwd().resolve()
-    
-    # Ensure the path is within the current working directory
-    try:
-        # Check if the resolved path starts with the current working directory
-        if not str(path).startswith(str(cwd)):
-            raise ValueError(f"Path {file_path} is outside the current directory")
-    except ValueError: # This can happen if path is on a different drive on Windows, etc.
-        raise ValueError(f"Path {file_path} is outside the current directory")
-    
-    return path
-
-def should_exclude_file(file_path: Path) -> bool:
-    """Check if a file should be excluded from processing."""
-    # Check if file name is in excluded files
-    if file_path.name in EXCLUDED_FILES:
-        return True
-    
-    # Check if file extension is in excluded extensions
-    if file_path.suffix.lower() in EXCLUDED_EXTENSIONS:
-        return True
-    
-    # Check for compound extensions like .min.js, .chunk.css, etc.
-    filename_lower = file_path.name.lower()
-    for ext in EXCLUDED_EXTENSIONS:
-        if filename_lower.endswith(ext):
-            return True
-    
-    # Check if it's a hidden file (starts with .)
-    if file_path.name.startswith('.'):
-        return True
-    
-    # Check if any parent directory is in excluded files
-    for parent in file_path.parents:
-        if parent.name in EXCLUDED_FILES:
-            return True
-    
-    return False
-
-def is_binary_file(file_path: Path) -> bool:
-    """Check if a file is binary."""
-    try:
-        with open(file_path, 'rb') as f:
-            chunk = f.read(1024)
-            return b'\0' in chunk
-    except Exception:
-        # If we can't read it, assume it's binary or inaccessible for safety
-        return True
-
-def is_text_file(file_path: Path) -> bool:
-    """Check if a file is a text file based on extension and content."""
-    # First check if it's in excluded extensions (early return for performance)
-    if file_path.suffix.lower() in EXCLUDED_EXTENSIONS:
-        return False
-    
-    # Common text file extensions
-    if file_path.suffix.lower() in ['.txt', '.py', '.js', '.ts', '.html', '.css', '.json', '.xml', '.yaml', '.yml', '.md', '.rst', '.sh', '.bat', '.gitignore', '.env', '.toml']:
-        return True
-    
-    # Guess mimetype, if it's text, it's likely text
-    mime_type, _ = mimetypes.guess_type(str(file_path))
-    if mime_type and mime_type.startswith('text/'):
-        return True
-    
-    # Fallback to binary check
-    return not is_binary_file(file_path)
-
-def read_local_file(file_path: str) -> Dict[str, Any]:
-    """Read content of a single file."""
-    try:
-        path = normalize_path(file_path)
-        
-        if not path.exists():
-            return {"error": f"File '{file_path}' does not exist"}
-        
-        if not path.is_file():
-            return {"error": f"'{file_path}' is not a file"}
-        
-        if path.stat().st_size > MAX_FILE_SIZE:
-            return {"error": f"File '{file_path}' is too large (max {MAX_FILE_SIZE} bytes)"}
-        
-        if not is_text_file(path):
-            return {"error": f"File '{file_path}' appears to be binary or non-textual"}
-        
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return {
-            "success": True,
-            "file_path": str(path),
-            "content": content,
-            "size": len(content)
-        }
-    except Exception as e:
-        return {"error": f"Failed to read '{file_path}': {str(e)}"}
-
-def read_multiple_files(file_paths: List[str]) -> Dict[str, Any]:
-    """Read contents of multiple files."""
-    results = {}
-    errors = []
-    
-    for file_path in file_paths:
-        result = read_local_file(file_path)
-        if "error" in result:
-            errors.append(f"'{file_path}': {result['error']}")
-        else:
-            results[file_path] = result
-    
-    return {
-        "success": len(errors) == 0,
-        "files": results,
-        "errors": errors
-    }
-
-def create_file(file_path: str, content: str) -> Dict[str, Any]:
-    """Create a new file or overwrite an existing one."""
-    try:
-        path = normalize_path(file_path)
-        
-        # Create parent directories if they don't exist
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return {
-            "success": True,
-            "file_path": str(path),
-            "size": len(content),
-            "message": f"File '{file_path}' created successfully"
-        }
-    except Exception as e:
-        return {"error": f"Failed to create '{file_path}': {str(e)}"}
-
-def create_multiple_files(files: List[Dict[str, str]]) -> Dict[str, Any]:
-    """Create multiple files."""
-    results = {}
-    errors = []
-    
-    for file_info in files:
-        if "path" not in file_info or "content" not in file_info:
-            errors.append("File info must contain 'path' and 'content' keys")
-            continue
-        
-        result = create_file(file_info["path"], file_info["content"])
-        if "error" in result:
-            errors.append(f"'{file_info['path']}': {result['error']}")
-        else:
-            results[file_info["path"]] = result
-    
-    return {
-        "success": len(errors) == 0,
-        "files": results,
-        "errors": errors
-    }
-
-def edit_file(file_path: str, original_snippet: str, new_snippet: str) -> Dict[str, Any]:
-    """Replace a specific original_snippet with new_snippet in a file."""
-    try:
-        path = normalize_path(file_path)
-        
-        if not path.exists():
-            return {"error": f"File '{file_path}' does not exist"}
-        
-        # Read current content
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        if original_snippet not in content:
-            return {"error": f"Original snippet not found in '{file_path}'"}
-        
-        # Replace the snippet
-        # Use replace(..., 1) to replace only the first occurrence for safety
-        new_content = content.replace(original_snippet, new_snippet, 1) 
-        
-        # Write back to file
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        return {
-            "success": True,
-            "file_path": str(path),
-            "message": f"File '{file_path}' edited successfully",
-            "changes": {
-                "original_length": len(content),
-                "new_length": len(new_content),
-                "diff": len(new_content) - len(content)
-            }
-        }
-    except Exception as e:
-        return {"error": f"Failed to edit '{file_path}': {str(e)}"}
-
-def list_directory(dir_path: str = ".") -> Dict[str, Any]:
-    """List contents of a directory."""
-    try:
-        path = normalize_path(dir_path)
-        
-        if not path.exists():
-            return {"error": f"Directory '{dir_path}' does not exist"}
-        
-        if not path.is_dir():
-            return {"error": f"'{dir_path}' is not a directory"}
-        
-        items = []
-        for item in path.iterdir():
-            # Use comprehensive exclusion logic
-            if should_exclude_file(item):
-                continue
-
-            item_info = {
-                "name": item.name,
-                "type": "directory" if item.is_dir() else "file",
-                "size": item.stat().st_size if item.is_file() else None
-            }
-            items.append(item_info)
-        
-        return {
-            "success": True,
-            "directory": str(path),
-            "items": items,
-            "count": len(items)
-        }
-    except Exception as e:
-        return {"error": f"Failed to list directory '{dir_path}': {str(e)}"}
-
 # Tool definitions for Gemini function calling (function_declarations)
 TOOLS = [
     {
@@ -449,12 +196,36 @@ TOOLS = [
                 "dir_path": {
                     "type": "string",
                     "description": "Path to the directory to list (default: current directory)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of items to return (default: all)"
                 }
             }
         }
     }
 ]
 
+# Diagnostic output (response dumps, tool-use complaints) is opt-in so the
+# happy path pays no Rich markup parsing for lines nobody reads
+_DEBUG = bool(os.getenv("GEMINI_DEBUG"))
+
+# Single compiled scan for "user asked for file creation" (debug check):
+# one DFA pass instead of a lowercase copy plus a substring search per word
+_CREATION_RE = re.compile(r"\b(?:create|build|generate|make|file|project)\b", re.IGNORECASE)
+
+# How many user/assistant exchanges ride along on each request. The full
+# transcript stays in memory for the session, but resending all of it makes
+# token cost and time-to-first-token grow with session length.
+MAX_HISTORY_TURNS = 20
+
+# Prebuilt tools payload for generate_content: the schema never changes at
+# runtime, so build the wrapper once instead of a fresh list+dict per turn
+# (the SDK re-validates whatever object it is handed either way, but at
+# least the Python-side allocation is amortized; a tuple also guards
+# against accidental mutation between turns).
+_TOOLS_PAYLOAD = ({"function_declarations": TOOLS},)
+
 # Function mapping for tool execution
 TOOL_FUNCTIONS = {
     "read_file": read_local_file,
@@ -465,21 +236,246 @@ TOOL_FUNCTIONS = {
     "list_directory": list_directory
 }
 
+class LLMCache:
+    """Small in-process LRU cache for deterministic model responses.
+
+    Keyed by a hash of (model, serialized messages), so a hit means the
+    exact same conversation state was already answered this session —
+    common when re-asking after /clear or replaying a prompt while
+    iterating. Entries expire after ``ttl`` seconds and the least recently
+    used entry is evicted past ``max_size``. Only pure-text responses are
+    cached; turns that triggered tool calls have side effects and must
+    always re-execute.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model_name: str, messages: List[Dict[str, Any]]) -> str:
+        payload = json.dumps({"model": model_name, "messages": messages},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
 class GeminiEngineer:
     """Main application class for Gemini Engineer."""
     
     def __init__(self):
         self.console = Console()
         self.conversation_history: List[ConversationMessage] = []
+        # Serialized Gemini view of the send window, kept in sync on append
+        # so each turn reuses it instead of rebuilding message dicts. The
+        # maxlen deque evicts the oldest turn in O(1) as new ones arrive;
+        # the system prompt is pinned separately so it never rotates out.
+        self._system_message: Optional[Dict[str, Any]] = None
+        # File contexts added via /add: append-only and emitted right after
+        # the system prompt, so the request prefix [system, pinned, rolling
+        # tail] stays byte-identical across turns — the layout server-side
+        # prefix caching needs — and /add'ed files never rotate out with
+        # the conversation window.
+        self._pinned_messages: List[Dict[str, Any]] = []
+        self._messages_cache: "deque[Dict[str, Any]]" = deque(maxlen=2 * MAX_HISTORY_TURNS)
+        # Rolling summary of turns evicted from the window, so long-range
+        # context degrades to a précis instead of vanishing outright
+        self._summary_message: Optional[Dict[str, Any]] = None
         self.model = None
+        # Response replay cache; disable with GEMINI_CACHE=0
+        self.response_cache = LLMCache() if os.getenv('GEMINI_CACHE', '1') != '0' else None
+        # Normalized paths already pinned via /add, so re-adding a file or
+        # directory doesn't duplicate its content in every request
+        self._added_files: set = set()
         self.history = InMemoryHistory()
+        # One PromptSession for the whole session: layout, key bindings and
+        # completer state are built once instead of per prompt() call
+        # ThreadedCompleter keeps completion generation off the UI thread and
+        # complete_while_typing=False defers it to an explicit Tab, so
+        # keystroke latency never depends on completer cost
+        self.session = PromptSession(
+            history=self.history,
+            auto_suggest=AutoSuggestFromHistory(),
+            completer=ThreadedCompleter(
+                WordCompleter(['/add', '/exit', '/quit', '/help', '/clear'], ignore_case=True)
+            ),
+            complete_while_typing=False
+        )
         self.setup_gemini_client()
-        
+
         # Add system prompt as the first message to guide AI behavior
-        self.conversation_history.append(ConversationMessage("system", SYSTEM_PROMPT))
-        
+        # (skipped when it already rides server-side in the context cache)
+        if self.cached_content is None:
+            self.add_message(ConversationMessage("system", SYSTEM_PROMPT))
+
+        # Session persistence: replay the tail of the previous session, then
+        # keep appending one JSONL line per turn (O(1) per message, no
+        # rewrite). GEMINI_HISTORY=0 turns it off.
+        self._history_fp = None
+        if os.getenv('GEMINI_HISTORY', '1') != '0':
+            history_path = os.getenv('GEMINI_HISTORY_FILE', '.gemini_history.jsonl')
+            try:
+                self._load_persisted_history(history_path)
+                self._history_fp = open(history_path, 'a', encoding='utf-8')
+            except OSError:
+                self._history_fp = None  # unwritable location; run in-memory
+
+    def _load_persisted_history(self, history_path: str):
+        """Replay the newest persisted turns into the send window."""
+        try:
+            with open(history_path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        restored = 0
+        for line in lines[-(2 * MAX_HISTORY_TURNS):]:
+            try:
+                record = json.loads(line)
+                message = ConversationMessage(record["role"], record["content"])
+            except (ValueError, KeyError):
+                continue  # torn write or hand-edited line; skip it
+            if message.role == "system":
+                continue
+            pinned = record.get("pinned", False)
+            if pinned:
+                # Re-register the pinned file so a post-restart /add of the
+                # same path hits the dedup check instead of pinning it twice.
+                # Pinned snippets always open with the "File: <path>" header.
+                header = message.content.split("\n", 1)[0]
+                if header.startswith("File: "):
+                    self._added_files.add(header[len("File: "):])
+            self.add_message(message, pinned=pinned, persist=False)
+            restored += 1
+        if restored:
+            self.console.print(f"[dim]↻ Restored {restored} messages from previous session[/dim]")
+
+    @staticmethod
+    def _to_gemini_message(message: ConversationMessage) -> Dict[str, Any]:
+        """Convert a ConversationMessage to the Gemini API message format."""
+        # System messages ride as user messages for compatibility
+        role = "model" if message.role == "assistant" else "user"
+        return {"role": role, "parts": [message.content]}
+
+    def add_message(self, message: ConversationMessage, pinned: bool = False,
+                    persist: bool = True):
+        """Append a message to the full record and the bounded send window.
+
+        ``pinned`` messages (file contexts from /add) join the stable
+        prefix after the system prompt instead of the rolling tail.
+        Non-system messages are also appended to the session log unless
+        ``persist`` is False (used when replaying that log at startup).
+        """
+        self.conversation_history.append(message)
+        if (persist and message.role != "system"
+                and getattr(self, '_history_fp', None) is not None):
+            try:
+                record = {"role": message.role, "content": message.content}
+                if pinned:
+                    record["pinned"] = True
+                self._history_fp.write(json.dumps(record) + "\n")
+                self._history_fp.flush()
+            except (OSError, ValueError):
+                self._history_fp = None  # disk went away; keep the session alive
+        serialized = self._to_gemini_message(message)
+        if message.role == "system":
+            self._system_message = serialized
+        elif pinned:
+            self._pinned_messages.append(serialized)
+        else:
+            if len(self._messages_cache) == self._messages_cache.maxlen:
+                self._compact_oldest()
+            self._messages_cache.append(serialized)
+
+    def _compact_oldest(self):
+        """Fold the oldest half of the window into the rolling summary.
+
+        A plain sliding window forgets evicted turns completely; instead,
+        one model call condenses them into a short précis that rides just
+        ahead of the rolling tail. Summarization is best-effort — if the
+        call fails the turns are simply dropped, which is what eviction
+        would have done anyway.
+        """
+        old = [self._messages_cache.popleft()
+               for _ in range(MAX_HISTORY_TURNS)
+               if self._messages_cache]
+        if self.model is None:
+            return
+        transcript = "\n".join(
+            f"{m['role']}: {m['parts'][0][:2000]}" for m in old
+        )
+        if self._summary_message is not None:
+            transcript = (
+                f"{self._summary_message['parts'][0]}\n{transcript}"
+            )
+        try:
+            response = self.model.generate_content(
+                "Summarize the following conversation concisely, keeping "
+                "file names, decisions and unresolved questions:\n\n" + transcript
+            )
+            summary = getattr(response, 'text', None)
+        except Exception:
+            summary = None
+        if summary:
+            self._summary_message = {
+                "role": "user",
+                "parts": [f"[Summary of earlier conversation]: {summary}"]
+            }
+
+    def _request_messages(self) -> List[Dict[str, Any]]:
+        """Return the message window actually sent to the API.
+
+        Layout is always [system prompt?, pinned file contexts, rolling
+        tail] in that order: the leading segments change only by append,
+        so the request prefix stays byte-identical across turns (prefix
+        caches hit), and the deque's maxlen bounds the tail to the newest
+        MAX_HISTORY_TURNS exchanges.
+        """
+        head = [self._system_message] if self._system_message is not None else []
+        if self._summary_message is not None:
+            head = head + self._pinned_messages + [self._summary_message]
+        else:
+            head = head + self._pinned_messages
+        return head + list(self._messages_cache)
+
+    def clear_history(self):
+        """Drop all conversation state and restore the system prompt."""
+        self.conversation_history.clear()
+        self._messages_cache.clear()
+        self._pinned_messages.clear()
+        self._system_message = None
+        self._summary_message = None
+        self._added_files.clear()
+        if self._history_fp is not None:
+            try:
+                self._history_fp.truncate(0)
+                self._history_fp.seek(0)
+            except OSError:
+                pass
+        if self.cached_content is None:
+            self.add_message(ConversationMessage("system", SYSTEM_PROMPT))
+
     def setup_gemini_client(self):
         """Initialize the Gemini client and model."""
+        # Deferred: only pay the SDK's protobuf/grpc import cost when a
+        # client is actually being set up
+        import google.generativeai as genai
+
         api_key = os.getenv('GEMINI_API_KEY')
         # Default to a stable model that supports function calling
         model_name = os.getenv('GEMINI_MODEL')
@@ -496,11 +492,40 @@ class GeminiEngineer:
             ))
             sys.exit(1)
             
+        self.model_name = model_name
         try:
             genai.configure(api_key=api_key)
-            # Use basic model initialization
-            self.model = genai.GenerativeModel(model_name)
-            self.console.print(f"[green]✅ Gemini client initialized successfully! (Model: {model_name})[/green]")
+            # Explicit context caching: upload the system prompt once as
+            # CachedContent so every turn references the cache instead of
+            # resending (and re-billing) those tokens. The TTL is short but
+            # _refresh_context_cache pushes it forward every turn, so it
+            # survives arbitrarily long sessions while still expiring soon
+            # after the last one ends. Not all models/keys support caching,
+            # and the prompt may fall below the cache minimum — in those
+            # cases fall back to plain initialization with the system
+            # prompt inlined into the history.
+            self.cached_content = None
+            if os.getenv('GEMINI_CONTEXT_CACHE', '1') != '0':
+                try:
+                    # The tool declarations ride inside the cache: the API
+                    # rejects a GenerateContent request that sets tools (or
+                    # system_instruction) alongside cachedContent, so they
+                    # must live server-side with the prompt.
+                    self.cached_content = genai.caching.CachedContent.create(
+                        model=model_name,
+                        system_instruction=SYSTEM_PROMPT,
+                        tools=list(_TOOLS_PAYLOAD),
+                        ttl=datetime.timedelta(minutes=10)
+                    )
+                except Exception:
+                    self.cached_content = None
+            if self.cached_content is not None:
+                self.model = genai.GenerativeModel.from_cached_content(cached_content=self.cached_content)
+                self.console.print(f"[green]✅ Gemini client initialized successfully! (Model: {model_name}, cached system prompt)[/green]")
+            else:
+                # Use basic model initialization
+                self.model = genai.GenerativeModel(model_name)
+                self.console.print(f"[green]✅ Gemini client initialized successfully! (Model: {model_name})[/green]")
         except Exception as e:
             self.console.print(f"[red]❌ Failed to initialize Gemini client: {e}[/red]")
             self.console.print(f"[yellow]💡 Make sure the model '{model_name}' is valid and available[/yellow]")
@@ -542,6 +567,58 @@ class GeminiEngineer:
         self.console.print(Panel(banner, style="bold blue"))
         self.console.print(Panel(instructions, title="🚀 Getting Started", border_style="cyan"))
 
+    # Tools with no side effects; safe to run concurrently within one turn
+    _READ_ONLY_TOOLS = frozenset({"read_file", "read_multiple_files", "list_directory"})
+
+    def _extract_tool_parameters(self, tool_call) -> Dict[str, Any]:
+        """Convert protobuf tool-call args into plain Python values."""
+        args = getattr(tool_call, 'args', None)
+        if args is not None:
+            try:
+                # The C-backed protobuf conversion decodes the whole args
+                # struct in one call — the Python fallback below walks every
+                # field by reflection, which is slow for the 50-entry lists
+                # create_multiple_files receives.
+                from google.protobuf.json_format import MessageToDict
+                return MessageToDict(args._pb)
+            except Exception:
+                pass  # unexpected arg shape or SDK layout; walk it manually
+
+        parameters = {}
+        if hasattr(tool_call, 'args'):
+            # Convert protobuf args to regular dict
+            for key, value in tool_call.args.items():
+                if hasattr(value, 'string_value'):
+                    parameters[key] = value.string_value
+                elif hasattr(value, 'list_value'):
+                    # Handle list values (for create_multiple_files)
+                    list_items = []
+                    for item in value.list_value.values:
+                        if hasattr(item, 'struct_value'):
+                            struct_dict = {}
+                            for struct_key, struct_val in item.struct_value.fields.items():
+                                if hasattr(struct_val, 'string_value'):
+                                    struct_dict[struct_key] = struct_val.string_value
+                            list_items.append(struct_dict)
+                    parameters[key] = list_items
+                else:
+                    parameters[key] = str(value)
+        return parameters
+
+    def _execute_tool_calls(self, calls: List[tuple]) -> List[Dict[str, Any]]:
+        """Run extracted (name, parameters) tool calls and return results in order.
+
+        A turn consisting purely of read-only tools (the model often asks for
+        several reads at once) executes concurrently so the wall time is the
+        slowest read, not the sum. Any turn containing a write keeps strict
+        sequential order, since later calls may depend on earlier files.
+        """
+        if len(calls) > 1 and all(name in self._READ_ONLY_TOOLS for name, _ in calls):
+            with ThreadPoolExecutor(max_workers=min(8, len(calls))) as executor:
+                futures = [executor.submit(self.execute_tool, name, params) for name, params in calls]
+                return [future.result() for future in futures]
+        return [self.execute_tool(name, params) for name, params in calls]
+
     def execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool function and return the result."""
         try:
@@ -572,14 +649,14 @@ class GeminiEngineer:
         else:
             if tool_name == "read_file":
                 self.console.print(Panel(
-                    f"[green]✅ Read {result['file_path']} ({result['size']} characters)[/green]",
+                    f"[green]✅ Read {result['file_path']} ({result['size']} bytes)[/green]",
                     title="File Read",
                     border_style="green"
                 ))
             elif tool_name == "read_multiple_files":
                 table = Table(title="Files Read Successfully")
                 table.add_column("File Path", style="cyan")
-                table.add_column("Size (chars)", style="green")
+                table.add_column("Size (bytes)", style="green")
                 
                 for file_path, file_result in result['files'].items():
                     table.add_row(file_path, str(file_result['size']))
@@ -648,39 +725,80 @@ class GeminiEngineer:
                 
                 self.console.print(table)
 
+    def _refresh_context_cache(self):
+        """Keep the server-side system-prompt cache alive across turns.
+
+        The CachedContent carries a 10-minute TTL; bumping it at the start
+        of every turn means it outlives any active session but still
+        expires shortly after the last one. If the bump fails — the cache
+        lapsed during a long pause or was evicted — drop to a plain model
+        with the system prompt back in-history, so the same model object
+        keeps working for streaming, fallbacks and summarization.
+        """
+        if self.cached_content is None:
+            return
+        try:
+            self.cached_content.update(ttl=datetime.timedelta(minutes=10))
+            return
+        except Exception:
+            pass
+        import google.generativeai as genai
+        self.cached_content = None
+        try:
+            self.model = genai.GenerativeModel(self.model_name)
+        except Exception:
+            return  # keep the cached model; the turn's own fallbacks apply
+        self.console.print("[dim]↻ context cache expired; system prompt re-inlined[/dim]")
+        if self._system_message is None:
+            self.add_message(ConversationMessage("system", SYSTEM_PROMPT))
+
     def stream_gemini_response(self, user_input: str):
         """Stream response from Gemini with function calling support."""
         try:
-            # Add user message to history
-            self.conversation_history.append(ConversationMessage("user", user_input))
-            
-            # If user is asking for file creation, add explicit tool usage instruction
-            if any(keyword in user_input.lower() for keyword in ["create", "build", "generate", "make", "html", "file", "project"]):
-                enhanced_input = f"{user_input}\n\nIMPORTANT: You MUST use the create_file or create_multiple_files function tools to actually create the files. Do not just describe the code - create the actual files!"
-                # Replace the last user message with the enhanced version
-                self.conversation_history[-1] = ConversationMessage("user", enhanced_input)
-            
-            # Prepare messages for Gemini API - convert all to basic format
-            messages = []
-            for msg in self.conversation_history:
-                if msg.role == "system":
-                    # Convert system message to user message for compatibility
-                    messages.append({"role": "user", "parts": [msg.content]})
-                elif msg.role == "assistant":
-                    messages.append({"role": "model", "parts": [msg.content]})
-                elif msg.role == "user":
-                    messages.append({"role": "user", "parts": [msg.content]})
+            self._refresh_context_cache()
+            # Add user message to history. No per-turn tool-usage nag is
+            # appended here: SYSTEM_PROMPT already carries the mandatory
+            # tool-use rules, and keeping user turns verbatim leaves the
+            # request prefix byte-identical up to the newest message, which
+            # is what lets the server-side prompt cache actually hit.
+            self.add_message(ConversationMessage("user", user_input))
+
+            # The serialized history is maintained on append, so no per-turn
+            # rebuild is needed; only the recent window is sent
+            messages = self._request_messages()
+
+            # Replay an identical conversation state from the local cache
+            # instead of paying a network round-trip for the same answer
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = LLMCache.make_key(self.model_name, messages)
+                cached_text = self.response_cache.get(cache_key)
+                if cached_text is not None:
+                    self.console.print("[dim]↻ cached response[/dim]")
+                    # Model text is not Rich markup — bracketed code like
+                    # x[i] must replay verbatim, same as the raw stream path
+                    self.console.print(cached_text, markup=False)
+                    self.add_message(ConversationMessage("assistant", cached_text))
+                    return
 
             with Progress(SpinnerColumn(), TextColumn("[blue]🤖 Analyzing and planning..."), console=self.console) as progress:
                 task = progress.add_task("processing", total=None)
                 
                 try:
-                    # Try with tools first
-                    response_stream = self.model.generate_content(
-                        messages,
-                        tools=[{"function_declarations": TOOLS}],
-                        stream=True
-                    )
+                    # Try with tools first. When the context cache is live
+                    # the tools are already attached server-side, and the
+                    # API rejects setting tools alongside cachedContent.
+                    if self.cached_content is not None:
+                        response_stream = self.model.generate_content(
+                            messages,
+                            stream=True
+                        )
+                    else:
+                        response_stream = self.model.generate_content(
+                            messages,
+                            tools=_TOOLS_PAYLOAD,
+                            stream=True
+                        )
                 except Exception as e:
                     self.console.print(f"[yellow]⚠️ Streaming with tools failed: {e}[/yellow]")
                     try:
@@ -702,110 +820,131 @@ class GeminiEngineer:
             ai_response_parts = []
             tool_calls = []
             
+            # Bind hot names once; the loop runs per streamed chunk.
+            # Streamed text goes straight to stdout — routing every token
+            # through Rich's markup/highlight pipeline dominates CPU during
+            # long responses — with a flush every few chunks so output still
+            # appears as it arrives. Rich stays in use for the structured
+            # notices around the stream.
+            append_text = ai_response_parts.append
+            append_call = tool_calls.append
+            console_print = self.console.print
+            stdout_write = sys.stdout.write
+            stdout_flush = sys.stdout.flush
+            chunks_since_flush = 0
+
             for chunk in response_stream:
                 try:
                     # Handle candidates structure - this is the main path for function calls
-                    if hasattr(chunk, 'candidates') and chunk.candidates:
-                        for candidate in chunk.candidates:
-                            if hasattr(candidate, 'content') and candidate.content:
-                                for part in candidate.content.parts:
-                                    # Handle function call parts FIRST (before trying text)
-                                    if hasattr(part, 'function_call') and part.function_call:
-                                        self.console.print(f"\n[green]📞 Function call detected: {part.function_call.name}[/green]")
-                                        tool_calls.append(part.function_call)
-                                    
-                                    # Handle text parts - but only if no function call in this part
-                                    elif hasattr(part, 'text'):
-                                        try:
-                                            text_content = part.text
-                                            if text_content:  # Only process if there's actual text
-                                                ai_response_parts.append(text_content)
-                                                self.console.print(text_content, end="")
-                                        except Exception as text_error:
-                                            # This part might contain something else
-                                            pass  # Silently skip text extraction errors
-                    
+                    candidates = getattr(chunk, 'candidates', None)
+                    if candidates:
+                        for candidate in candidates:
+                            content = getattr(candidate, 'content', None)
+                            if not content:
+                                continue
+                            for part in content.parts:
+                                # Handle function call parts FIRST (accessing
+                                # .text on a call part raises in the SDK)
+                                if getattr(part, 'function_call', None):
+                                    console_print(f"\n[green]📞 Function call detected: {part.function_call.name}[/green]")
+                                    append_call(part.function_call)
+                                else:
+                                    try:
+                                        text_content = part.text
+                                    except Exception:
+                                        # This part might contain something else
+                                        continue
+                                    if text_content:  # Only process if there's actual text
+                                        append_text(text_content)
+                                        stdout_write(text_content)
+                                        chunks_since_flush += 1
+                                        if chunks_since_flush >= 16:
+                                            stdout_flush()
+                                            chunks_since_flush = 0
+                        continue
+
                     # Fallback: Handle direct text attribute only if no candidates structure
-                    elif hasattr(chunk, 'text') and chunk.text:
-                        ai_response_parts.append(chunk.text)
-                        self.console.print(chunk.text, end="")
-                        
+                    text_content = getattr(chunk, 'text', None)
+                    if text_content:
+                        append_text(text_content)
+                        stdout_write(text_content)
+                        chunks_since_flush += 1
+                        if chunks_since_flush >= 16:
+                            stdout_flush()
+                            chunks_since_flush = 0
+
                 except Exception as e:
                     # Skip problematic chunks instead of crashing
                     continue
-            
+            stdout_flush()
+
             if ai_response_parts:
                 ai_response_text = "".join(ai_response_parts)
-                self.console.print(f"\n[cyan dim]DEBUG: AI response text: {ai_response_text[:200]}...[/cyan dim]")
-                self.conversation_history.append(ConversationMessage("assistant", ai_response_text))
-                print()  # New line after streaming
+                if _DEBUG:
+                    self.console.print(f"\n[cyan dim]DEBUG: AI response text: {ai_response_text[:200]}...[/cyan dim]")
+                self.add_message(ConversationMessage("assistant", ai_response_text))
+                if cache_key is not None and not tool_calls:
+                    # Pure-text turn: safe to replay verbatim later
+                    self.response_cache.set(cache_key, ai_response_text)
+                sys.stdout.write("\n")  # New line after streaming
             
             # Execute any tool calls
             if tool_calls:
                 self.console.print("\n[yellow]🔧 Executing tools...[/yellow]")
-                
+
+                # Extract all parameters up front so execution can be batched
+                calls = []
                 for i, tool_call in enumerate(tool_calls, 1):
                     try:
-                        tool_name = tool_call.name
-                        
-                        # Extract parameters - improved approach
-                        parameters = {}
-                        if hasattr(tool_call, 'args'):
-                            # Convert protobuf args to regular dict
-                            for key, value in tool_call.args.items():
-                                if hasattr(value, 'string_value'):
-                                    parameters[key] = value.string_value
-                                elif hasattr(value, 'list_value'):
-                                    # Handle list values (for create_multiple_files)
-                                    list_items = []
-                                    for item in value.list_value.values:
-                                        if hasattr(item, 'struct_value'):
-                                            struct_dict = {}
-                                            for struct_key, struct_val in item.struct_value.fields.items():
-                                                if hasattr(struct_val, 'string_value'):
-                                                    struct_dict[struct_key] = struct_val.string_value
-                                            list_items.append(struct_dict)
-                                    parameters[key] = list_items
-                                else:
-                                    parameters[key] = str(value)
-                        
-                        # Show tool execution with enhanced feedback
-                        if tool_name == "create_multiple_files":
-                            file_count = len(parameters.get('files', []))
-                            self.console.print(f"[cyan]▶ [{i}/{len(tool_calls)}] {tool_name} - Creating {file_count} files...[/cyan]")
-                        else:
-                            param_display = ', '.join(f'{k}={str(v)[:50]}...' if len(str(v)) > 50 else f'{k}={v}' for k, v in parameters.items())
-                            self.console.print(f"[cyan]▶ [{i}/{len(tool_calls)}] {tool_name}({param_display})[/cyan]")
-                        
-                        result = self.execute_tool(tool_name, parameters)
-                        self.display_tool_result(tool_name, result)
-                        
-                        # Simple follow-up after all tools are executed
-                        if i == len(tool_calls): 
-                            self.console.print(f"\n[blue]🤖 Processing results...[/blue]")
-                            
-                            # Create a simple follow-up message
-                            if result.get("success"):
-                                if tool_name == "create_multiple_files":
-                                    file_count = len(result.get('files', {}))
-                                    follow_up_content = f"I have successfully created {file_count} files. The project is ready!"
-                                else:
-                                    follow_up_content = f"I have successfully executed {tool_name}."
-                            else:
-                                follow_up_content = f"There was an issue with {tool_name}: {result.get('error', 'Unknown error')}"
-                            
-                            # Add the follow-up response
-                            self.conversation_history.append(ConversationMessage("assistant", follow_up_content))
-                            self.console.print(follow_up_content)
-                            print()
-                                
+                        calls.append((tool_call.name, self._extract_tool_parameters(tool_call)))
                     except Exception as e:
                         self.console.print(f"[red]❌ Error processing tool call {i}: {e}[/red]")
-                        continue
+
+                # Show tool execution with enhanced feedback. The
+                # announcement lines render in one console.print — a single
+                # markup parse and terminal flush for the whole batch
+                # instead of one per call.
+                announcements = []
+                for i, (tool_name, parameters) in enumerate(calls, 1):
+                    if tool_name == "create_multiple_files":
+                        file_count = len(parameters.get('files', []))
+                        announcements.append(f"[cyan]▶ [{i}/{len(calls)}] {tool_name} - Creating {file_count} files...[/cyan]")
+                    else:
+                        param_display = ', '.join(f'{k}={str(v)[:50]}...' if len(str(v)) > 50 else f'{k}={v}' for k, v in parameters.items())
+                        announcements.append(f"[cyan]▶ [{i}/{len(calls)}] {tool_name}({param_display})[/cyan]")
+                if announcements:
+                    self.console.print("\n".join(announcements))
+
+                results = self._execute_tool_calls(calls)
+
+                for (tool_name, _), result in zip(calls, results):
+                    self.display_tool_result(tool_name, result)
+
+                # Simple follow-up after all tools are executed
+                if calls:
+                    self.console.print(f"\n[blue]🤖 Processing results...[/blue]")
+
+                    tool_name = calls[-1][0]
+                    result = results[-1]
+
+                    # Create a simple follow-up message
+                    if result.get("success"):
+                        if tool_name == "create_multiple_files":
+                            file_count = len(result.get('files', {}))
+                            follow_up_content = f"I have successfully created {file_count} files. The project is ready!"
+                        else:
+                            follow_up_content = f"I have successfully executed {tool_name}."
+                    else:
+                        follow_up_content = f"There was an issue with {tool_name}: {result.get('error', 'Unknown error')}"
+
+                    # Add the follow-up response
+                    self.add_message(ConversationMessage("assistant", follow_up_content))
+                    self.console.print(follow_up_content)
+                    sys.stdout.write("\n")
 
             else:
                 # If no tool calls were made, and user asked for creation, remind the AI
-                if any(keyword in user_input.lower() for keyword in ["create", "build", "generate", "make", "file", "project"]):
+                if _DEBUG and _CREATION_RE.search(user_input):
                     self.console.print(f"\n[yellow]💡 Note: For creating files, the AI should use the create_multiple_files tool automatically.[/yellow]")
                     self.console.print(f"[red]DEBUG: AI didn't use tools despite being asked to create something![/red]")
                         
@@ -817,13 +956,36 @@ class GeminiEngineer:
                 simple_response = self.model.generate_content(user_input)
                 if hasattr(simple_response, 'text'):
                     self.console.print(f"\n[blue]AI Response:[/blue] {simple_response.text}")
-                    self.conversation_history.append(ConversationMessage("assistant", simple_response.text))
+                    self.add_message(ConversationMessage("assistant", simple_response.text))
                 else:
                     self.console.print(f"[red]❌ Simple fallback returned no text.[/red]")
             except Exception as simple_e:
                 self.console.print(f"[red]❌ Simple fallback also failed: {simple_e}[/red]")
 
 
+    # Files above this many characters enter the history as a preview; the
+    # full text stays on disk for the tools to re-read.
+    _CONTEXT_FULL_LIMIT = MAX_FILE_SIZE // 8
+    _CONTEXT_PREVIEW_CHARS = 4096
+
+    def _context_snippet(self, result: Dict[str, Any]) -> str:
+        """Render a read result for the conversation history.
+
+        Small files go in verbatim. Large ones would be recopied into every
+        subsequent API call as the history grows, so only a head preview
+        plus a pointer is recorded; the model can read_file the path when
+        it actually needs the rest.
+        """
+        content = result["content"]
+        if len(content) <= self._CONTEXT_FULL_LIMIT:
+            return f"File: {result['file_path']}\n```\n{content}\n```"
+        preview = content[:self._CONTEXT_PREVIEW_CHARS]
+        return (
+            f"File: {result['file_path']}\n```\n{preview}\n```\n"
+            f"[preview only — {result['size']} bytes total; "
+            f"use read_file('{result['file_path']}') for the full content]"
+        )
+
     def add_file_to_context(self, file_path: str):
         """Add a file or directory to the conversation context."""
         try:
@@ -834,82 +996,109 @@ class GeminiEngineer:
                 return
             
             if path.is_file():
+                if str(path) in self._added_files:
+                    self.console.print(f"[yellow]ℹ️ '{path}' is already in context[/yellow]")
+                    return
                 result = read_local_file(str(path))
                 if "error" in result:
                     self.console.print(f"[red]❌ {result['error']}[/red]")
                 else:
                     # Add file content as a user message for context
-                    content_text = f"File: {result['file_path']}\n```\n{result['content']}\n```"
-                    self.conversation_history.append(ConversationMessage("user", content_text))
+                    self.add_message(ConversationMessage("user", self._context_snippet(result)), pinned=True)
+                    self._added_files.add(str(path))
                     self.console.print(f"[green]✅ Added '{path}' to context[/green]")
-            
+
             elif path.is_dir():
                 added_count = 0
                 skipped_count = 0
-                for file_path in path.rglob("*"):  # Recursive glob
-                    # Skip excluded files and directories
-                    if should_exclude_file(file_path):
+                duplicate_count = 0
+                # Pruned scandir walk: excluded directories are never entered
+                text_paths = []
+                for file_path in walk_text_candidates(path):
+                    if str(file_path) in self._added_files:
+                        duplicate_count += 1
+                    elif is_text_file(file_path):
+                        text_paths.append(str(file_path))
+                    else:  # If it's a file but not text
                         skipped_count += 1
-                        continue
-                    
-                    if file_path.is_file() and is_text_file(file_path):
-                        try:
-                            result = read_local_file(str(file_path))
-                            if "success" in result:
-                                content_text = f"File: {result['file_path']}\n```\n{result['content']}\n```"
-                                self.conversation_history.append(ConversationMessage("user", content_text))
-                                added_count += 1
-                            else:
-                                skipped_count += 1
-                        except Exception as e:
-                            skipped_count += 1
-                            continue
-                    elif file_path.is_file():  # If it's a file but not text
+
+                # Fan the reads out to threads: read(2) releases the GIL, so
+                # large folders ingest at disk parallelism instead of
+                # one-file-at-a-time latency.
+                if text_paths:
+                    max_workers = min(32, (os.cpu_count() or 1) * 4)
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        read_results = executor.map(read_local_file, text_paths, chunksize=16)
+                else:
+                    read_results = []
+
+                # History appends stay on this thread; the list isn't thread-safe
+                for result in read_results:
+                    if "success" in result:
+                        self.add_message(ConversationMessage("user", self._context_snippet(result)), pinned=True)
+                        self._added_files.add(result["file_path"])
+                        added_count += 1
+                    else:
                         skipped_count += 1
-                
-                self.console.print(f"[green]✅ Added {added_count} text files from '{path}' to context. Skipped {skipped_count} files (binary/non-text/errors).[/green]")
+
+                summary = (f"[green]✅ Added {added_count} text files from '{path}' to context. "
+                           f"Skipped {skipped_count} files (binary/non-text/errors).")
+                if duplicate_count:
+                    summary += f" {duplicate_count} already in context."
+                self.console.print(summary + "[/green]")
                 
         except Exception as e:
             self.console.print(f"[red]❌ Error adding '{file_path}' to context: {e}[/red]")
 
+    def _cmd_exit(self, _rest: str) -> bool:
+        self.console.print("[yellow]👋 Goodbye![/yellow]")
+        return False
+
+    def _cmd_help(self, _rest: str) -> bool:
+        self.display_welcome_banner()
+        return True
+
+    def _cmd_clear(self, _rest: str) -> bool:
+        self.clear_history()
+        self.console.print("[green]✅ Conversation history cleared[/green]")
+        return True
+
+    def _cmd_add(self, rest: str) -> bool:
+        rest = rest.strip()
+        if rest:
+            self.add_file_to_context(rest)
+        else:
+            self.console.print("[yellow]Usage: /add <file-or-directory>[/yellow]")
+        return True
+
     def run_interactive_loop(self):
         """Run the main interactive loop."""
-        completer = WordCompleter(['/add', '/exit', '/quit', '/help', '/clear'], ignore_case=True)
-        
+        # O(1) command dispatch; handlers return False to leave the loop.
+        # Only the short command token is lowercased, never the whole input.
+        commands = {
+            '/exit': self._cmd_exit,
+            '/quit': self._cmd_exit,
+            '/help': self._cmd_help,
+            '/clear': self._cmd_clear,
+            '/add': self._cmd_add,
+        }
         try:
             while True:
                 try:
-                    user_input = prompt(
-                        "🤖 gemini-engineer> ",
-                        history=self.history,
-                        auto_suggest=AutoSuggestFromHistory(),
-                        completer=completer
-                    ).strip()
-                    
+                    user_input = self.session.prompt("🤖 gemini-engineer> ").strip()
+
                     if not user_input:
                         continue
-                    
+
                     # Handle commands
-                    if user_input.lower() in ['/exit', '/quit']:
-                        self.console.print("[yellow]👋 Goodbye![/yellow]")
-                        break
-                    
-                    elif user_input.lower() == '/help':
-                        self.display_welcome_banner()
-                        continue
-                    
-                    elif user_input.lower() == '/clear':
-                        self.conversation_history.clear()
-                        # Re-add system prompt after clearing
-                        self.conversation_history.append(ConversationMessage("system", SYSTEM_PROMPT))
-                        self.console.print("[green]✅ Conversation history cleared[/green]")
-                        continue
-                    
-                    elif user_input.startswith('/add '):
-                        file_path = user_input[5:].strip()
-                        self.add_file_to_context(file_path)
-                        continue
-                    
+                    if user_input.startswith('/'):
+                        cmd, _, rest = user_input.partition(' ')
+                        handler = commands.get(cmd.lower())
+                        if handler is not None:
+                            if handler(rest):
+                                continue
+                            break
+
                     # Process regular user input
                     self.stream_gemini_response(user_input)
                     
@@ -67,39 +67,59 @@ class Calculator:
 def fibonacci(n: int) -> int:
     """
     Calculate the nth Fibonacci number.
-    Note: This is a naive recursive implementation that could be optimized.
+    Iterative two-variable form: O(n) time, O(1) space, no recursion limit.
     """
     if n <= 0:
         return 0
-    elif n == 1:
-        return 1
-    else:
-        return fibonacci(n - 1) + fibonacci(n - 2)
+    a, b = 0, 1
+    for _ in range(n - 1):
+        a, b = b, a + b
+    return b
 
 def factorial(n: int) -> int:
     """Calculate factorial of n."""
     if n < 0:
         raise ValueError("Factorial is not defined for negative numbers!")
-    if n == 0 or n == 1:
-        return 1
-    return n * factorial(n - 1)
+    # math.factorial runs in C — no Python recursion frames
+    return math.factorial(n)
 
 def is_prime(number: int) -> bool:
-    """Check if a number is prime."""
+    """Check if a number is prime.
+
+    Trial division over the 2,3-wheel: after rejecting multiples of 2 and
+    3, candidate divisors follow the 5, 7, 11, 13, ... pattern (alternating
+    steps of 2 and 4), testing about a third as many numbers as a plain
+    range.
+    """
     if number < 2:
         return False
-    for i in range(2, int(math.sqrt(number)) + 1):
+    if number < 4:
+        return True
+    if number % 2 == 0 or number % 3 == 0:
+        return False
+    i, step = 5, 2
+    while i * i <= number:
         if number % i == 0:
             return False
+        i += step
+        step = 6 - step
     return True
 
 def find_primes(limit: int) -> List[int]:
-    """Find all prime numbers up to the given limit."""
-    primes = []
-    for num in range(2, limit + 1):
-        if is_prime(num):
-            primes.append(num)
-    return primes
+    """Find all prime numbers up to the given limit.
+
+    Sieve of Eratosthenes over a bytearray: O(n log log n) instead of
+    per-number trial division, with the inner marking loop running as a
+    C-level slice assignment.
+    """
+    if limit < 2:
+        return []
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(math.sqrt(limit)) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return [i for i, flag in enumerate(sieve) if flag]
 
 def main():
     """Main function to demonstrate the calculator."""